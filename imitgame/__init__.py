@@ -1,6 +1,24 @@
 """Imitation Game - Turing test party game with pluggable AI providers."""
 
-from .game import ImitationGame
-from .providers import Message, Provider
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .game import ImitationGame
+    from .providers import Message, Provider
+
+# Re-exports are resolved on first access (PEP 562) so that importing the
+# package - e.g. for `imitgame --help` - doesn't pull in the provider SDKs.
+_LAZY = {
+    "ImitationGame": ".game",
+    "Provider": ".providers",
+    "Message": ".providers",
+}
 
 __all__ = ["Provider", "Message", "ImitationGame"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
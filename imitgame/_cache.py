@@ -0,0 +1,153 @@
+"""On-disk cache of provider responses, for replaying games during development."""
+
+import hashlib
+import os
+import time
+from collections.abc import Iterator, Sequence
+
+from . import _json
+from .providers import Message, Provider
+
+DEFAULT_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", "~/.cache"), "imitgame", "responses.db"
+)
+# Cached replies older than this are ignored and pruned
+TTL = 7 * 24 * 3600
+
+
+class ResponseCache:
+    """A persistent prompt -> response store shared by CachedProviders.
+
+    Responses live in SQLite, compressed with zstd when zstandard is
+    installed and zlib otherwise; each row records its codec.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = TTL):
+        # Imported here: games without a cache shouldn't load these
+        import sqlite3
+        import zlib
+
+        try:
+            import zstandard
+        except ImportError:  # pragma: no cover
+            zstandard = None
+
+        self._codecs = {"zlib": (zlib.compress, zlib.decompress)}
+        self._codec = "zlib"
+        if zstandard is not None:
+            self._codecs["zstd"] = (zstandard.compress, zstandard.decompress)
+            self._codec = "zstd"
+
+        path = os.path.expanduser(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._ttl = ttl
+        # Prefetched responses are requested (and stored) from a worker thread
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses"
+                " (key TEXT PRIMARY KEY, model TEXT, ts INTEGER, codec TEXT, blob BLOB)"
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE ts < ?", (time.time() - ttl,)
+            )
+
+    def key(
+        self, provider: Provider, kind: str, messages: Sequence[Message], actor_id: str
+    ) -> str:
+        # name alone doesn't pin every model (the Gemini judge votes with
+        # `model`, while name reports the prefill model), so add it explicitly
+        prompt = [(m.role, m.actor_id, m.content) for m in messages]
+        ident = [provider.name, getattr(provider, "model", None), kind, actor_id]
+        return hashlib.blake2b(_json.dumpb([ident, prompt]), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        row = self._db.execute(
+            "SELECT codec, blob FROM responses WHERE key = ? AND ts >= ?",
+            (key, time.time() - self._ttl),
+        ).fetchone()
+        # A row written with a codec that isn't installed here is a miss
+        if row is None or row[0] not in self._codecs:
+            return None
+        return self._codecs[row[0]][1](row[1]).decode()
+
+    def put(self, key: str, model: str, response: str) -> None:
+        blob = self._codecs[self._codec][0](response.encode())
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, model, int(time.time()), self._codec, blob),
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class CachedProvider(Provider):
+    """Wraps a provider and replays its responses for prompts seen before.
+
+    Only meant for AI providers: a cached human would answer by itself.
+    """
+
+    def __init__(self, inner: Provider, cache: ResponseCache):
+        self._inner = inner
+        self._cache = cache
+
+    @property
+    def name(self) -> str:
+        return self._inner.name
+
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
+        key = self._cache.key(self._inner, "respond", messages, actor_id)
+        response = self._cache.get(key)
+        if response is None:
+            response = self._inner.respond(messages, actor_id)
+            self._cache.put(key, self._inner.name, response)
+        return response
+
+    def respond_vote(self, messages: Sequence[Message], actor_id: str) -> str:
+        key = self._cache.key(self._inner, "vote", messages, actor_id)
+        response = self._cache.get(key)
+        if response is None:
+            response = self._inner.respond_vote(messages, actor_id)
+            self._cache.put(key, self._inner.name, response)
+        return response
+
+    def respond_stream(
+        self, messages: Sequence[Message], actor_id: str
+    ) -> Iterator[str]:
+        key = self._cache.key(self._inner, "respond", messages, actor_id)
+        response = self._cache.get(key)
+        if response is not None:
+            yield response
+            return
+
+        chunks = []
+        for chunk in self._inner.respond_stream(messages, actor_id):
+            chunks.append(chunk)
+            yield chunk
+        # Only a fully received response is stored
+        self._cache.put(key, self._inner.name, "".join(chunks))
+
+    async def arespond(self, messages: Sequence[Message], actor_id: str) -> str:
+        key = self._cache.key(self._inner, "respond", messages, actor_id)
+        response = self._cache.get(key)
+        if response is None:
+            response = await self._inner.arespond(messages, actor_id)
+            self._cache.put(key, self._inner.name, response)
+        return response
+
+    async def arespond_vote(self, messages: Sequence[Message], actor_id: str) -> str:
+        key = self._cache.key(self._inner, "vote", messages, actor_id)
+        response = self._cache.get(key)
+        if response is None:
+            response = await self._inner.arespond_vote(messages, actor_id)
+            self._cache.put(key, self._inner.name, response)
+        return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
@@ -0,0 +1,78 @@
+"""HTTP client settings and the retry policy shared by the providers."""
+
+import asyncio
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import httpx
+
+# Replies are short, but some models (and the judge) think for a while
+TIMEOUT = 120.0
+# Every provider talks to one host: keep its connections alive
+LIMITS = httpx.Limits(max_keepalive_connections=16)
+
+# Rate limits and transient server errors are retried on the same pooled
+# connections. Generation has no side effects, so retrying POST is fine.
+# Failed connects are retried by the transports themselves.
+RETRIES = 4
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_BACKOFF = 0.5
+# No single wait is longer than this, whatever Retry-After asks for: a turn
+# shouldn't stall for minutes on one rate-limited player
+_MAX_DELAY = 8.0
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float | None:
+    """Seconds to wait before retrying the request, or None to keep the response.
+
+    Honors Retry-After (in seconds) up to the cap; otherwise backs off
+    exponentially with jitter, so concurrent players don't retry in lockstep.
+    """
+    if attempt >= RETRIES or response.status_code not in RETRY_STATUSES:
+        return None
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(_MAX_DELAY, float(retry_after))
+    return min(_MAX_DELAY, _BACKOFF * 2**attempt) + random.uniform(0, _BACKOFF)
+
+
+def post(client: httpx.Client, url: str, **kwargs) -> httpx.Response:
+    """POST with retries; returns the last response, successful or not."""
+    attempt = 0
+    while True:
+        response = client.post(url, **kwargs)
+        delay = retry_delay(response, attempt)
+        if delay is None:
+            return response
+        time.sleep(delay)
+        attempt += 1
+
+
+async def apost(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """Async variant of post()."""
+    attempt = 0
+    while True:
+        response = await client.post(url, **kwargs)
+        delay = retry_delay(response, attempt)
+        if delay is None:
+            return response
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+@contextmanager
+def stream_post(client: httpx.Client, url: str, **kwargs) -> Iterator[httpx.Response]:
+    """Streaming POST with retries, used like client.stream("POST", ...)."""
+    attempt = 0
+    while True:
+        with client.stream("POST", url, **kwargs) as response:
+            delay = retry_delay(response, attempt)
+            if delay is None:
+                yield response
+                return
+            # Read the (short) error body so the connection goes back to the pool
+            response.read()
+        time.sleep(delay)
+        attempt += 1
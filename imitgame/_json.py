@@ -0,0 +1,59 @@
+"""JSON helpers backed by orjson when it's installed, stdlib json otherwise."""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so callers can catch one type
+JSONDecodeError = json.JSONDecodeError
+
+# Content-Type for request bodies encoded with dumpb()
+HEADERS = {"Content-Type": "application/json"}
+
+# A fenced ```json {...}``` block, any fenced block, and the outermost {...}
+_OBJECT_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_ANY_FENCE_RE = re.compile(r"```\s*(.*?)\s*```", re.DOTALL)
+_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+if orjson is not None:
+    loads = orjson.loads
+    dumpb = orjson.dumps
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+else:
+    loads = json.loads
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumpb(obj) -> bytes:
+        return dumps(obj).encode()
+
+
+def unfence(text: str) -> str:
+    """Return the first Markdown code block's contents, or the stripped text.
+
+    A block holding a JSON object is preferred over any other block.
+    """
+    text = text.strip()
+    if "```" in text:
+        match = _OBJECT_FENCE_RE.search(text) or _ANY_FENCE_RE.search(text)
+        if match:
+            return match.group(1)
+    return text
+
+
+def extract_object(text: str) -> str:
+    """Cut the JSON object out of a model response (fences, prose around it)."""
+    candidate = unfence(text)
+    if candidate.startswith("{") and candidate.endswith("}"):
+        return candidate
+
+    match = _OBJECT_RE.search(candidate)
+    return match.group(0) if match else candidate
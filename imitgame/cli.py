@@ -2,31 +2,58 @@
 
 import argparse
 import sys
+from collections.abc import Iterator, Sequence
 
-from .game import ImitationGame
-from .providers import (
-    GeminiPrefillProvider,
-    HumanProvider,
-    OpenRouterProvider,
-    Provider,
-)
+# SDK-backed providers and the game are imported where they are used, so
+# that `--help` and argument errors don't pay for the provider SDK imports.
+from .providers import Message, Provider
 
 # Preset model configurations
 # YES, these models indeed do exist. Do not attempt to downgrade them.
 PRESETS = {
-    "cheap": [
+    "cheap": (
         "minimax/minimax-m2.1",
         "google/gemini-3-flash-preview",
         "moonshotai/kimi-k2-0905:exacto",
-    ],
-    "smart": [
+    ),
+    "smart": (
         "google/gemini-3-flash-preview",
         "anthropic/claude-opus-4.5",
         "gemini-prefill",
         "human",
-    ],
+    ),
 }
 
+# "human" is a seat, not a model - it's added separately from the AI providers
+AI_MODELS = {
+    name: tuple(m for m in models if m != "human") for name, models in PRESETS.items()
+}
+HAS_HUMAN = {name: "human" in models for name, models in PRESETS.items()}
+
+
+class DummyHuman(Provider):
+    """Fake human for demo mode - just uses an AI."""
+
+    def __init__(self):
+        from .providers import OpenRouterProvider
+
+        self._inner = OpenRouterProvider(model="openai/gpt-5.1-chat")
+
+    @property
+    def name(self) -> str:
+        return "fake-human"
+
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
+        return self._inner.respond(messages, actor_id)
+
+    def respond_stream(
+        self, messages: Sequence[Message], actor_id: str
+    ) -> Iterator[str]:
+        return self._inner.respond_stream(messages, actor_id)
+
+    def close(self) -> None:
+        self._inner.close()
+
 
 def create_provider(spec: str) -> Provider:
     """Create a provider from a specification string.
@@ -38,11 +65,19 @@ def create_provider(spec: str) -> Provider:
     - Just "model/name" - Assumes OpenRouter
     """
     if spec == "human":
+        from .providers import HumanProvider
+
         return HumanProvider()
 
     if spec.startswith("gemini:prefill") or spec == "gemini-prefill":
+        from .providers import GeminiPrefillProvider
+
         model = spec.split(":", 2)[2] if spec.count(":") >= 2 else None
-        return GeminiPrefillProvider(model=model) if model else GeminiPrefillProvider()
+        if model:
+            return GeminiPrefillProvider(prefill_model=model)
+        return GeminiPrefillProvider()
+
+    from .providers import OpenRouterProvider
 
     if spec.startswith("openrouter:"):
         model = spec[len("openrouter:") :]
@@ -54,21 +89,20 @@ def create_provider(spec: str) -> Provider:
 
 def cmd_play(args):
     """Play a game with human participant."""
+    from .game import ImitationGame
+    from .providers import GeminiPrefillProvider, HumanProvider
+
     # Build provider list
     preset = args.preset if hasattr(args, "preset") and args.preset else None
 
     if preset:
-        preset_models = PRESETS.get(preset, PRESETS["cheap"])
-        # Filter out "human" from AI providers as it's added separately
-        ai_models = [m for m in preset_models if m != "human"]
+        ai_models = AI_MODELS.get(preset, AI_MODELS["cheap"])
         providers = [create_provider(m) for m in ai_models]
     elif args.models:
         providers = [create_provider(m) for m in args.models]
     else:
         # Default to cheap preset without human
-        preset_models = PRESETS["cheap"]
-        ai_models = [m for m in preset_models if m != "human"]
-        providers = [create_provider(m) for m in ai_models]
+        providers = [create_provider(m) for m in AI_MODELS["cheap"]]
 
     # Add Gemini prefill if requested
     if args.with_prefill:
@@ -76,41 +110,29 @@ def cmd_play(args):
 
     human = HumanProvider(args.name or "You")
 
-    game = ImitationGame(
-        providers=providers, human_provider=human, num_turns=args.turns
-    )
-
     topic = args.topic or "What makes someone seem human in a text conversation?"
-    result = game.play(topic)
+    with ImitationGame(
+        providers=providers,
+        human_provider=human,
+        num_turns=args.turns,
+        parallel=args.parallel,
+        stream=args.stream,
+        cache=args.cache,
+    ) as game:
+        result = game.play(topic)
 
     return 0 if not result.human_caught else 1
 
 
 def cmd_demo(args):
     """Run a demo game with no human (all AI), OR with a real human if 'human' is in preset."""
-    from .providers.base import Message, Provider
-
-    class DummyHuman(Provider):
-        """Fake human for demo mode - just uses an AI."""
-
-        def __init__(self):
-            self._inner = OpenRouterProvider(model="openai/gpt-5.1-chat")
-
-        @property
-        def name(self) -> str:
-            return "fake-human"
-
-        def respond(self, messages: list[Message], actor_id: str) -> str:
-            return self._inner.respond(messages, actor_id)
+    from .game import ImitationGame
+    from .providers import GeminiPrefillProvider, HumanProvider
 
     preset = args.preset if hasattr(args, "preset") and args.preset else "cheap"
-    preset_models = PRESETS[preset]
-
     # Check if "human" is in the preset - if so, use real human
-    has_human = "human" in preset_models
-    ai_models = [m for m in preset_models if m != "human"]
-
-    providers = [create_provider(m) for m in ai_models]
+    has_human = HAS_HUMAN[preset]
+    providers = [create_provider(m) for m in AI_MODELS[preset]]
 
     if args.with_prefill:
         providers.append(GeminiPrefillProvider())
@@ -122,18 +144,20 @@ def cmd_demo(args):
         else DummyHuman()
     )
 
-    game = ImitationGame(
-        providers=providers, human_provider=human, num_turns=args.turns
-    )
-
     topic = args.topic or "Is this performance art?"
-    game.play(topic)
+    with ImitationGame(
+        providers=providers,
+        human_provider=human,
+        num_turns=args.turns,
+        parallel=args.parallel,
+        stream=args.stream,
+        cache=args.cache,
+    ) as game:
+        game.play(topic)
 
 
 def cmd_test_provider(args):
     """Test a single provider with a simple prompt."""
-    from .providers import Message
-
     provider = create_provider(args.provider)
     print(f"Testing provider: {provider.name}")
 
@@ -146,17 +170,14 @@ def cmd_test_provider(args):
         ),
     ]
 
-    response = provider.respond(messages, "Actor 2")
+    try:
+        response = provider.respond(messages, "Actor 2")
+    finally:
+        provider.close()
     print(f"\nResponse:\n{response}")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Imitation Game - Turing test party game"
-    )
-    subparsers = parser.add_subparsers(dest="command", help="Commands")
-
-    # Play command
+def _build_play_parser(subparsers):
     play_parser = subparsers.add_parser("play", help="Play a game")
     play_parser.add_argument("-t", "--topic", help="Conversation topic")
     play_parser.add_argument("-n", "--name", help="Your display name")
@@ -170,9 +191,22 @@ def main():
     play_parser.add_argument(
         "--with-prefill", action="store_true", help="Include Gemini prefill mode"
     )
+    play_parser.add_argument(
+        "--parallel", action="store_true", help="Ask AI players concurrently"
+    )
+    play_parser.add_argument(
+        "--stream", action="store_true", help="Print messages as they are generated"
+    )
+    play_parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=None,
+        help="Replay AI responses for prompts seen before (or IMITGAME_CACHE=1)",
+    )
     play_parser.set_defaults(func=cmd_play)
 
-    # Demo command
+
+def _build_demo_parser(subparsers):
     demo_parser = subparsers.add_parser(
         "demo", help="Run demo (no human, unless 'human' in preset)"
     )
@@ -187,15 +221,62 @@ def main():
     demo_parser.add_argument(
         "--with-prefill", action="store_true", help="Include Gemini prefill"
     )
+    demo_parser.add_argument(
+        "--parallel", action="store_true", help="Ask AI players concurrently"
+    )
+    demo_parser.add_argument(
+        "--stream", action="store_true", help="Print messages as they are generated"
+    )
+    demo_parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=None,
+        help="Replay AI responses for prompts seen before (or IMITGAME_CACHE=1)",
+    )
     demo_parser.set_defaults(func=cmd_demo)
 
-    # Test provider command
+
+def _build_test_parser(subparsers):
     test_parser = subparsers.add_parser("test", help="Test a provider")
     test_parser.add_argument(
         "provider", help="Provider spec (e.g., 'openai/gpt-4o-mini')"
     )
     test_parser.set_defaults(func=cmd_test_provider)
 
+
+SUBPARSERS = {
+    "play": _build_play_parser,
+    "demo": _build_demo_parser,
+    "test": _build_test_parser,
+}
+
+
+def _sniff_subcommand(argv: list[str]) -> str | None:
+    """Find the subcommand on the command line without a full parse.
+
+    Returns None for top-level help, so it still lists every command.
+    """
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            return None
+        if arg in SUBPARSERS:
+            return arg
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Imitation Game - Turing test party game"
+    )
+    subparsers = parser.add_subparsers(dest="command", help="Commands")
+
+    # Only build the subparser that will run; build all of them when the
+    # command is unknown so help and usage errors stay complete
+    command = _sniff_subcommand(sys.argv[1:])
+    builders = [SUBPARSERS[command]] if command else SUBPARSERS.values()
+    for build in builders:
+        build(subparsers)
+
     args = parser.parse_args()
 
     if not args.command:
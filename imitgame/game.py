@@ -1,30 +1,110 @@
 """Core game logic for the Imitation Game."""
 
+import asyncio
+import itertools
 import json
 import os
+import re
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, wait
 from dataclasses import dataclass, field
+from importlib import resources
 
+from . import _json
+from ._cache import CachedProvider, ResponseCache
 from .providers import Message, Provider
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover
+    uvloop = None
 
-def _load_prompt(name: str, **kwargs) -> str:
-    """Load a prompt template from prompts/ directory and format it."""
-    path = os.path.join(os.path.dirname(__file__), "..", "prompts", f"{name}.txt")
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-    return content.format(**kwargs) if kwargs else content
+# Event loop for parallel turns: uvloop's when it's installed, asyncio's otherwise
+_LOOP_FACTORY = uvloop.new_event_loop if uvloop is not None else None
 
+# Vote parsing patterns, compiled once
+# Either an explicit "vote": "Actor N" (group 1) or a bare Actor N mention (group 2)
+_VOTE_RE = re.compile(r'(?i:"vote"\s*:\s*"(Actor \d+)")|Actor (\d+)')
+# Reasoning matches up to the closing quote (handles escaped quotes inside)
+_REASONING_RE = re.compile(r'"reasoning"\s*:\s*"((?:[^"\\]|\\.)*)"', re.IGNORECASE)
 
-@dataclass
+_DECODER = json.JSONDecoder()
+
+
+def _find_vote_object(text: str) -> dict | None:
+    """Find the first JSON object with a "vote" key embedded in text."""
+    # Fast path: the judge normally returns a bare JSON object
+    try:
+        data = _json.loads(text)
+    except _json.JSONDecodeError:
+        pass
+    else:
+        if isinstance(data, dict) and "vote" in data:
+            return data
+
+    idx = text.find("{")
+    while idx != -1:
+        try:
+            data, _ = _DECODER.raw_decode(text, idx)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(data, dict) and "vote" in data:
+                return data
+        idx = text.find("{", idx + 1)
+    return None
+
+
+def _strip_echoed_prefix(chunks: Iterable[str], prefix: str) -> Iterator[str]:
+    """Drop leading whitespace and an echoed "Actor N:" prefix from a chunk stream."""
+    chunks = iter(chunks)
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if len(head.lstrip()) >= len(prefix):
+            break
+
+    head = head.lstrip()
+    if head.startswith(prefix):
+        head = head[len(prefix) :].lstrip()
+        while not head:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            head = chunk.lstrip()
+
+    if head:
+        yield head
+    yield from chunks
+
+
+# Prompt templates ship inside the package (imitgame/prompts/), read once
+_PROMPTS = {
+    name: (resources.files(__package__) / "prompts" / f"{name}.txt").read_text("utf-8")
+    for name in ("system_game", "initial_topic")
+}
+_SYSTEM_TEMPLATE = _PROMPTS["system_game"]
+_INITIAL_TEMPLATE = _PROMPTS["initial_topic"]
+
+
+@dataclass(slots=True)
 class Participant:
     """A participant in the game (human or AI)."""
 
     provider: Provider
     actor_id: str
     is_human: bool = False
+    prefix: str = field(init=False, repr=False)  # "Actor N:" as models echo it
 
+    def __post_init__(self):
+        self.actor_id = sys.intern(self.actor_id)
+        self.prefix = f"{self.actor_id}:"
 
-@dataclass
+
+@dataclass(slots=True)
 class VoteResult:
     """Result of a vote from one participant."""
 
@@ -33,7 +113,7 @@ class VoteResult:
     reasoning: str
 
 
-@dataclass
+@dataclass(slots=True)
 class GameResult:
     """Final result of a game round."""
 
@@ -43,6 +123,37 @@ class GameResult:
     conversation: list[Message]
 
 
+class _PromptView(Sequence[Message]):
+    """Read-only ``[system] + history`` that doesn't copy the history.
+
+    The view is fixed to the history length at creation, so later appends
+    to the conversation don't leak into a call that is still running.
+    """
+
+    __slots__ = ("_system", "_history", "_end")
+
+    def __init__(self, system: Message, history: list[Message]):
+        self._system = system
+        self._history = history
+        self._end = len(history)
+
+    def __len__(self) -> int:
+        return self._end + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("prompt index out of range")
+        return self._system if index == 0 else self._history[index - 1]
+
+    def __iter__(self) -> Iterator[Message]:
+        yield self._system
+        yield from itertools.islice(self._history, self._end)
+
+
 class ImitationGame:
     """The main game orchestrator.
 
@@ -52,6 +163,31 @@ class ImitationGame:
     3. Multiple rounds of conversation
     4. Everyone votes on who they think is human
     5. Human wins if not identified by majority
+
+    Use the game as a context manager (or call close()) to release the
+    providers' HTTP connections when done.
+
+    With ``parallel=True`` the AI participants of a turn are asked concurrently
+    and all answer the same snapshot of the conversation; the human still
+    answers last and sees the whole turn. Each concurrent call is bounded by
+    ``response_timeout`` seconds; participants that time out skip the turn.
+
+    With ``prefetch=True`` (sequential turns without streaming), once a
+    message is added the next AI participant's prompt is fixed, so its
+    response is requested in the background while the caller handles the
+    message. The prefetched response is used only if the conversation hasn't
+    changed in the meantime. It pays off for callers that spend time between
+    messages (a UI); one that stops iterating early still pays for the
+    prefetched reply, so it's off by default.
+
+    With ``stream=True``, play() prints messages as they are generated.
+    Streaming only applies to participants asked one by one, so it is not
+    combined with parallel turns.
+
+    With ``cache=True``, AI and judge responses are stored on disk and
+    replayed whenever the exact same prompt comes up again, which makes
+    reruns during development free. The human is never cached. Replies are
+    sampled, so caching is opt-in; by default it follows ``IMITGAME_CACHE=1``.
     """
 
     def __init__(
@@ -59,27 +195,68 @@ class ImitationGame:
         providers: list[Provider],
         human_provider: Provider,
         num_turns: int = 4,
+        parallel: bool = False,
+        response_timeout: float | None = 120.0,
+        stream: bool = False,
+        cache: bool | None = None,
+        prefetch: bool = False,
     ):
         self.num_turns = num_turns
-
-        # Create participants with fixed order (from input list)
-        all_providers = providers + [human_provider]
-
+        self.parallel = parallel
+        self.response_timeout = response_timeout
+        self.stream = stream
+        self.prefetch = prefetch
+
+        if cache is None:
+            cache = os.environ.get("IMITGAME_CACHE") == "1"
+        self._cache = ResponseCache() if cache else None
+        if self._cache is not None:
+            providers = [CachedProvider(p, self._cache) for p in providers]
+
+        # Create participants with fixed order (from input list), partitioning
+        # them by role as we go - roles are fixed for the whole game
         self.participants: list[Participant] = []
-        for i, provider in enumerate(all_providers, 1):
-            self.participants.append(
-                Participant(
-                    provider=provider,
-                    actor_id=f"Actor {i}",
-                    is_human=(provider is human_provider),
-                )
+        self.ai_participants: list[Participant] = []
+        for i, provider in enumerate([*providers, human_provider], 1):
+            participant = Participant(
+                provider=provider,
+                actor_id=f"Actor {i}",
+                is_human=(provider is human_provider),
             )
-
-        self.human_actor_id = next(p.actor_id for p in self.participants if p.is_human)
+            self.participants.append(participant)
+            if participant.is_human:
+                self.human_participant = participant
+            else:
+                self.ai_participants.append(participant)
+        self.human_actor_id = self.human_participant.actor_id
         self.conversation: list[Message] = []
 
+        # Per-participant system messages, built once per conversation
+        self._system_messages: dict[str, Message] = {}
+
+        # Judge is created on first vote; verdicts are keyed by transcript
+        self._judge: Provider | None = None
+        self._verdicts: dict[tuple, str] = {}
+
+    def close(self) -> None:
+        """Release the providers' (and the judge's) network resources."""
+        for participant in self.participants:
+            participant.provider.close()
+        if self._judge is not None:
+            self._judge.close()
+            self._judge = None
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def __enter__(self) -> "ImitationGame":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _system_message(self, topic: str, actor_id: str | None = None) -> Message:
-        content = _load_prompt("system_game", topic=topic, actor_id=actor_id)
+        content = _SYSTEM_TEMPLATE.format_map({"topic": topic, "actor_id": actor_id})
 
         return Message(
             role="system",
@@ -89,115 +266,242 @@ class ImitationGame:
     def _initial_message(self, topic: str) -> Message:
         return Message(
             role="user",
-            content=_load_prompt("initial_topic", topic=topic),
+            content=_INITIAL_TEMPLATE.format_map({"topic": topic}),
             actor_id="System",
         )
 
-    def run_conversation(self, topic: str):
-        """Run the conversation phase, yielding each message as it happens."""
+    def run_conversation(
+        self, topic: str, on_chunk: Callable[[str, str], None] | None = None
+    ):
+        """Run the conversation phase, yielding each message as it happens.
+
+        If on_chunk is given, sequential turns stream each response and call
+        on_chunk(actor_id, text) for every chunk before the message is yielded.
+        """
         # Note: We'll send the system message per-participant to include their ID
+        self._system_messages = {
+            p.actor_id: self._system_message(topic, p.actor_id)
+            for p in self.participants
+        }
         self.conversation = [self._initial_message(topic)]
 
         yield self.conversation[-1]  # Yield initial message
 
-        for turn in range(self.num_turns):
-            for participant in self.participants:
-                # Add participant-specific system message for the call
-                sys_msg = self._system_message(topic, participant.actor_id)
-                current_messages = [sys_msg] + self.conversation
-
-                # Get response from this participant
-                response_text = participant.provider.respond(
-                    current_messages, participant.actor_id
-                )
+        if not self.parallel:
+            yield from self._run_sequential(on_chunk)
+            return
+
+        with asyncio.Runner(loop_factory=_LOOP_FACTORY) as runner:
+            try:
+                for turn in range(self.num_turns):
+                    # All AI calls of this turn see the same conversation snapshot
+                    responses = runner.run(self._arespond_all(self.ai_participants))
+
+                    # Collect in actor order; the human answers inline, after the batch
+                    for participant in self.participants:
+                        if participant.is_human:
+                            response_text = self._respond(participant)
+                        else:
+                            response_text = responses[participant.actor_id]
+
+                        if response_text is None:
+                            print(f"[{participant.actor_id} timed out, skipping]")
+                            continue
+
+                        msg = self._add_response(participant, response_text)
+                        if msg:
+                            yield msg
+            finally:
+                # Async clients are bound to this loop; close them before it goes
+                runner.run(self._aclose_all(self.ai_participants))
+
+    def _run_sequential(
+        self, on_chunk: Callable[[str, str], None] | None
+    ) -> Iterator[Message]:
+        """Ask participants one by one, optionally prefetching the next AI."""
+        order = [p for _ in range(self.num_turns) for p in self.participants]
+        prefetch = self.prefetch and on_chunk is None
+        # (conversation length, last message, future) of a prefetched response
+        prefetched: tuple[int, Message, Future[str]] | None = None
+        for i, participant in enumerate(order):
+            response_text = None
+            if prefetched is not None:
+                length, last, future = prefetched
+                conversation = self.conversation
+                if length == len(conversation) and last is conversation[-1]:
+                    response_text = future.result()
+                else:
+                    # Stale: let it finish before asking the provider
+                    # again, so it never has two calls in flight
+                    future.cancel()
+                    wait((future,))
+                prefetched = None
+            if response_text is None:
+                response_text = self._respond(participant, on_chunk)
+
+            msg = self._add_response(participant, response_text)
+
+            upcoming = order[i + 1] if i + 1 < len(order) else None
+            if prefetch and upcoming and not upcoming.is_human:
+                future = self._prefetch(upcoming)
+                prefetched = (len(self.conversation), self.conversation[-1], future)
+
+            if msg:
+                yield msg
 
-                # Skip empty responses (some providers may fail silently)
-                if not response_text or not response_text.strip():
-                    print(f"[{participant.actor_id} returned empty response, skipping]")
-                    continue
-
-                # Strip actor prefix if model echoed it (common with multi-party format)
-                response_text = response_text.strip()
-                prefix = f"{participant.actor_id}:"
-                if response_text.startswith(prefix):
-                    response_text = response_text[len(prefix) :].strip()
-
-                msg = Message(
-                    role="assistant",
-                    content=response_text,
-                    actor_id=participant.actor_id,
+    def _prefetch(self, participant: Participant) -> Future[str]:
+        """Ask a participant for their next message on a background thread.
+
+        The thread is a daemon, so Ctrl-C exits right away instead of
+        waiting for the request to finish.
+        """
+        future: Future[str] = Future()
+        prompt = self._prompt(participant)
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(
+                    participant.provider.respond(prompt, participant.actor_id)
                 )
-                self.conversation.append(msg)
-                yield msg
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    async def _arespond_all(
+        self, participants: list[Participant]
+    ) -> dict[str, str | None]:
+        """Ask all given participants concurrently; None marks a timeout."""
+        responses = await asyncio.gather(*(self._arespond(p) for p in participants))
+        return {p.actor_id: r for p, r in zip(participants, responses)}
+
+    async def _aclose_all(self, participants: list[Participant]) -> None:
+        await asyncio.gather(*(p.provider.aclose() for p in participants))
+
+    def _prompt(self, participant: Participant) -> _PromptView:
+        """The participant's system message followed by the conversation so far."""
+        return _PromptView(
+            self._system_messages[participant.actor_id], self.conversation
+        )
 
-    def run_voting(self) -> list[VoteResult]:
-        """Run the voting phase using a separate Judge."""
-        # We use Gemini as the external judge (flash model, pro has thinking mode issues)
-        from .providers import GeminiPrefillProvider
+    async def _arespond(self, participant: Participant) -> str | None:
+        current_messages = self._prompt(participant)
 
-        judge = GeminiPrefillProvider(model="gemini-3-flash-preview")
+        try:
+            return await asyncio.wait_for(
+                participant.provider.arespond(current_messages, participant.actor_id),
+                self.response_timeout,
+            )
+        except TimeoutError:
+            return None
 
-        # List all actors for context
-        actor_list = ", ".join(p.actor_id for p in self.participants)
+    def _respond(
+        self,
+        participant: Participant,
+        on_chunk: Callable[[str, str], None] | None = None,
+    ) -> str:
+        """Ask one participant for their next message, optionally streaming it."""
+        # Add participant-specific system message for the call
+        current_messages = self._prompt(participant)
+
+        if on_chunk is None:
+            return participant.provider.respond(current_messages, participant.actor_id)
+
+        chunks = []
+        stream = participant.provider.respond_stream(
+            current_messages, participant.actor_id
+        )
+        for chunk in _strip_echoed_prefix(stream, participant.prefix):
+            on_chunk(participant.actor_id, chunk)
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    def _add_response(
+        self, participant: Participant, response_text: str
+    ) -> Message | None:
+        """Clean up a response and append it to the conversation."""
+        # Skip empty responses (some providers may fail silently)
+        if not response_text or not response_text.strip():
+            print(f"[{participant.actor_id} returned empty response, skipping]")
+            return None
+
+        # Strip actor prefix if model echoed it (common with multi-party format)
+        response_text = response_text.strip()
+        if response_text.startswith(participant.prefix):
+            response_text = response_text[len(participant.prefix) :].strip()
+
+        msg = Message(
+            role="assistant",
+            content=response_text,
+            actor_id=participant.actor_id,
+        )
+        self.conversation.append(msg)
+        return msg
 
-        # The judge doesn't need to be a participant, just a static call
-        # We use respond_vote logic which we just upgraded for Judge behavior
-        response = judge.respond_vote(self.conversation, "Judge")
+    def run_voting(self) -> list[VoteResult]:
+        """Run the voting phase using a separate Judge.
+
+        The verdict is memoized per transcript, so voting again on an
+        unchanged conversation doesn't call the judge a second time.
+        """
+        if self._judge is None:
+            # We use Gemini as the external judge (flash model, pro has thinking mode issues)
+            from .providers import GeminiPrefillProvider
+
+            self._judge = GeminiPrefillProvider(model="gemini-3-flash-preview")
+            if self._cache is not None:
+                self._judge = CachedProvider(self._judge, self._cache)
+
+        key = tuple((m.role, m.actor_id, m.content) for m in self.conversation)
+        response = self._verdicts.get(key)
+        if response is None:
+            # The judge doesn't need to be a participant, just a static call
+            # We use respond_vote logic which we just upgraded for Judge behavior
+            response = self._judge.respond_vote(self.conversation, "Judge")
+            self._verdicts[key] = response
 
         vote = self._parse_vote("Judge", response)
         return [vote]
 
     def _parse_vote(self, voter_id: str, response: str) -> VoteResult:
         """Parse a vote response, handling various formats."""
-        import re
-
-        text = response.strip()
-
         # Try to find JSON in the response
         # First: clean markdown code blocks
-        if "```" in text:
-            # Match code blocks with optional json label, capture content inside
-            match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-            if match:
-                text = match.group(1)
-            else:
-                # If no clear JSON block, try to find any block
-                match = re.search(r"```\s*(.*?)\s*```", text, re.DOTALL)
-                if match:
-                    text = match.group(1)
+        text = _json.unfence(response)
 
-        # Try direct JSON parse
-        try:
-            data = json.loads(text)
+        # Decode the first JSON object in the text (tolerates prose around it)
+        data = _find_vote_object(text)
+        if data is not None:
             return VoteResult(
                 voter_id=voter_id,
-                voted_for=data.get("vote", "Unknown"),
+                voted_for=data["vote"],
                 reasoning=data.get("reasoning", ""),
             )
-        except json.JSONDecodeError:
-            pass
-
-        # Fallback: try to find JSON-like object anywhere in text
-        # Look for "vote": "Actor N"
-        vote_match = re.search(r'"vote"\s*:\s*"(Actor \d+)"', text, re.IGNORECASE)
-        # For reasoning, match everything until the closing pattern (handles quotes inside)
-        reasoning_match = re.search(r'"reasoning"\s*:\s*"((?:[^"\\]|\\.)*)"', text, re.IGNORECASE)
 
-        if vote_match:
-            return VoteResult(
-                voter_id=voter_id,
-                voted_for=vote_match.group(1),
-                reasoning=reasoning_match.group(1)
-                if reasoning_match
-                else "(extracted)",
-            )
+        # Fallback: JSON may be truncated or malformed. One pass over the text
+        # that returns an explicit "vote": "Actor N" as soon as it's found and
+        # otherwise remembers the first bare "Actor N" mention.
+        mention = None
+        for match in _VOTE_RE.finditer(text):
+            if match.group(1):
+                reasoning_match = _REASONING_RE.search(text)
+                return VoteResult(
+                    voter_id=voter_id,
+                    voted_for=match.group(1),
+                    reasoning=reasoning_match.group(1)
+                    if reasoning_match
+                    else "(extracted)",
+                )
+            mention = mention or match
 
-        # Last resort: look for "Actor N" pattern in response
-        actor_match = re.search(r"Actor (\d+)", text)
-        if actor_match:
+        # Last resort: the first "Actor N" mentioned anywhere in the response
+        if mention:
             return VoteResult(
                 voter_id=voter_id,
-                voted_for=f"Actor {actor_match.group(1)}",
+                voted_for=f"Actor {mention.group(2)}",
                 reasoning=f"(raw response: {text})",
             )
 
@@ -205,35 +509,48 @@ class ImitationGame:
         return VoteResult(
             voter_id=voter_id,
             voted_for="Parse Error",
-            reasoning=f"Could not extract vote from response",
+            reasoning="Could not extract vote from response",
         )
 
-        return votes
-
     def play(self, topic: str) -> GameResult:
         """Play a full game and return the result."""
+        streaming: str | None = None  # actor whose message is being printed
+
+        def print_chunk(actor_id: str, text: str) -> None:
+            nonlocal streaming
+            if streaming != actor_id:
+                streaming = actor_id
+                print(f"\033[1m{actor_id}\033[0m: ", end="")
+            print(text, end="", flush=True)
+
         # Run conversation (consume the generator)
-        for msg in self.run_conversation(topic):
-            if msg.actor_id:
+        on_chunk = print_chunk if self.stream else None
+        for msg in self.run_conversation(topic, on_chunk=on_chunk):
+            if msg.actor_id and msg.actor_id == streaming:
+                streaming = None
+                print("\n")
+            elif msg.actor_id:
                 print(f"\033[1m{msg.actor_id}\033[0m: {msg.content}\n")
 
         print("\n=== JUDGEMENT ===\n")
         votes = self.run_voting()
 
-        # In this mode, we have one authoritative Judge vote
-        judge_vote = votes[0]
-        print(f"Judge Decision: {judge_vote.voted_for}")
-        print(f"Reasoning: {judge_vote.reasoning}\n")
+        for vote in votes:
+            print(f"{vote.voter_id} Decision: {vote.voted_for}")
+            print(f"Reasoning: {vote.reasoning}\n")
 
-        # Determine if human was caught
-        human_caught = judge_vote.voted_for == self.human_actor_id
+        # Determine if human was caught by majority
+        # (in this mode there is one authoritative Judge vote)
+        vote_counts = Counter(vote.voted_for for vote in votes)
+        most_voted, _ = vote_counts.most_common(1)[0] if vote_counts else (None, 0)
+        human_caught = most_voted == self.human_actor_id
 
         print(f"=== RESULT ===")
         print(f"Human was: {self.human_actor_id}")
         if human_caught:
             print("Judge CORRECTLY identified the human! 🍺 You win! Free beer.")
         else:
-            print(f"Judge was DECEIVED! They thought {judge_vote.voted_for} was human.")
+            print(f"Judge was DECEIVED! They thought {most_voted} was human.")
             print("You lose! AI was more convincing than you. No beer.")
 
         return GameResult(
@@ -1,8 +1,20 @@
 """Provider implementations."""
 
+import importlib
+from typing import TYPE_CHECKING
+
 from .base import HumanProvider, Message, Provider
-from .gemini_prefill import GeminiPrefillProvider
-from .openrouter import OpenRouterProvider
+
+if TYPE_CHECKING:
+    from .gemini_prefill import GeminiPrefillProvider
+    from .openrouter import OpenRouterProvider
+
+# SDK-backed providers are imported on first access (PEP 562), so using
+# the base types doesn't pull in httpx or google-genai
+_LAZY = {
+    "OpenRouterProvider": ".openrouter",
+    "GeminiPrefillProvider": ".gemini_prefill",
+}
 
 __all__ = [
     "Provider",
@@ -11,3 +23,9 @@ __all__ = [
     "OpenRouterProvider",
     "GeminiPrefillProvider",
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
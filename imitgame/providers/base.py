@@ -1,11 +1,12 @@
 """Base provider interface and common types."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
 from typing import Literal
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """A message in the conversation."""
 
@@ -30,7 +31,7 @@ class Provider(ABC):
         ...
 
     @abstractmethod
-    def respond(self, messages: list[Message], actor_id: str) -> str:
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
         """Generate a response given conversation history.
 
         Args:
@@ -42,7 +43,7 @@ class Provider(ABC):
         """
         ...
     
-    def respond_vote(self, messages: list[Message], actor_id: str) -> str:
+    def respond_vote(self, messages: Sequence[Message], actor_id: str) -> str:
         """Generate a vote response. 
         
         Override this for providers that need different behavior for voting
@@ -52,6 +53,45 @@ class Provider(ABC):
         """
         return self.respond(messages, actor_id)
 
+    def respond_stream(self, messages: Sequence[Message], actor_id: str) -> Iterator[str]:
+        """Generate a response as a stream of text chunks.
+
+        Default implementation yields the whole respond() result at once.
+        Override for providers whose API can stream tokens.
+        """
+        yield self.respond(messages, actor_id)
+
+    def close(self) -> None:
+        """Release network resources (HTTP sessions, clients) held by the provider.
+
+        Default implementation has nothing to release.
+        """
+
+    async def arespond(self, messages: Sequence[Message], actor_id: str) -> str:
+        """Async variant of respond(), used when participants are asked concurrently.
+
+        Default implementation runs respond() in a worker thread. Override this
+        for providers with a native async client.
+        """
+        # Imported here: asyncio is slow to import and the CLI only needs it
+        # for parallel turns (it would cost `imitgame --help` ~35 ms)
+        import asyncio
+
+        return await asyncio.to_thread(self.respond, messages, actor_id)
+
+    async def arespond_vote(self, messages: Sequence[Message], actor_id: str) -> str:
+        """Async variant of respond_vote(), see arespond()."""
+        import asyncio
+
+        return await asyncio.to_thread(self.respond_vote, messages, actor_id)
+
+    async def aclose(self) -> None:
+        """Release async resources (clients bound to the running event loop).
+
+        Called before the event loop used for concurrent calls shuts down.
+        Default implementation has nothing to release.
+        """
+
 
 class HumanProvider(Provider):
     """Provider that gets input from a human player."""
@@ -63,7 +103,7 @@ class HumanProvider(Provider):
     def name(self) -> str:
         return self._name
 
-    def respond(self, messages: list[Message], actor_id: str) -> str:
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
         # Show recent context
         print(f"\n--- Your turn as {actor_id} ---")
         return input("> ").strip()
@@ -5,23 +5,29 @@ predict how the conversation would continue - closer to a base model's
 behavior. This gives a fundamentally different "epistemology of humanness".
 """
 
-import json
+import asyncio
+import importlib.util
 import os
-import re
+import weakref
+from collections.abc import Iterator, Sequence
+from functools import cached_property
+from importlib import resources
+from itertools import chain
 
-import requests
+import httpx
 
+from .. import _http, _json
 from .base import Message, Provider
 
+_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# Multiplex the calls over HTTP/2 when h2 is installed (httpx[http2])
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
 
 def _load_prompt(name: str) -> str:
-    """Load a prompt from the prompts/ directory."""
-    prompts_dir = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "prompts"
-    )
-    path = os.path.join(prompts_dir, f"{name}.txt")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    """Load a prompt from the package's prompts/ directory."""
+    return (resources.files("imitgame") / "prompts" / f"{name}.txt").read_text("utf-8")
 
 
 class GeminiPrefillProvider(Provider):
@@ -32,12 +38,21 @@ class GeminiPrefillProvider(Provider):
     persona and tests a different kind of humanness.
     """
 
+    # Prompts are read once, at import
     PERSONA = _load_prompt("persona_ondrej")
+    SYSTEM_TRANSCRIPT_SIM = _load_prompt("system_transcript_sim")
+    JUDGE_VOTE = _load_prompt("judge_vote")
 
     def __init__(
-        self, model: str = "gemini-3-flash-preview", api_key: str | None = None
+        self,
+        model: str = "gemini-3-flash-preview",
+        api_key: str | None = None,
+        prefill_model: str = "gemini-3-pro-preview",
     ):
+        # `model` answers the judge vote; prefill turns use `prefill_model`.
+        # Pro on purpose for prefill; it's just so much better.
         self.model = model
+        self.prefill_model = prefill_model
         self.api_key = (
             api_key
             or os.environ.get("GOOGLE_API_KEY")
@@ -47,45 +62,138 @@ class GeminiPrefillProvider(Provider):
             raise ValueError(
                 "GOOGLE_API_KEY or GEMINI_API_KEY environment variable not set"
             )
+        # The key goes in a header, so it never shows up in logged URLs
+        self._headers = {**_json.HEADERS, "x-goog-api-key": self.api_key}
+        self._generate_url = f"{_API_BASE}/{prefill_model}:generateContent"
+        self._stream_url = f"{_API_BASE}/{prefill_model}:streamGenerateContent"
+        # Clients are created on first use: the judge instance only votes
+        # through google-genai and never needs them
+        self._client: httpx.Client | None = None
+        # An AsyncClient is bound to the event loop it was first used on, so
+        # there is one per loop; entries of loops that are gone go with them
+        self._aclients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # (message count, last message, rendered text) - see _transcript()
+        self._transcript_cache: tuple[int, Message | None, str] = (0, None, "")
 
     @property
     def name(self) -> str:
-        return f"{self.model}:prefill"
+        return f"{self.prefill_model}:prefill"
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        genai_client = self.__dict__.pop("_genai_client", None)
+        if genai_client is not None:
+            genai_client.close()
+
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
+        return "".join(self.respond_stream(messages, actor_id))
+
+    def respond_stream(
+        self, messages: Sequence[Message], actor_id: str
+    ) -> Iterator[str]:
+        body = _json.dumpb(self._prefill_payload(messages, actor_id))
+        with _http.stream_post(
+            self._sync_client(), self._stream_url, params={"alt": "sse"}, content=body
+        ) as response:
+            if not response.is_success:
+                raise RuntimeError(f"Gemini error: {response.read().decode()}")
+            # Server-sent events, one "data: {...}" line per chunk
+            for line in response.iter_lines():
+                if line.startswith("data:"):
+                    yield from self._chunk_text(_json.loads(line[5:]))
+
+    async def arespond(self, messages: Sequence[Message], actor_id: str) -> str:
+        body = _json.dumpb(self._prefill_payload(messages, actor_id))
+        response = await _http.apost(
+            self._async_client(), self._generate_url, content=body
+        )
+        return self._prefill_text(_json.loads(response.content))
+
+    async def aclose(self) -> None:
+        client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                headers=self._headers,
+                timeout=_http.TIMEOUT,
+                transport=httpx.HTTPTransport(
+                    http2=_HTTP2, limits=_http.LIMITS, retries=_http.RETRIES
+                ),
+            )
+        return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            client = self._aclients[loop] = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=_http.TIMEOUT,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=_HTTP2, limits=_http.LIMITS, retries=_http.RETRIES
+                ),
+            )
+        return client
+
+    @staticmethod
+    def _prefill_text(data: dict) -> str:
+        if "candidates" not in data:
+            raise RuntimeError(f"Gemini error: {data}")
+
+        return data["candidates"][0]["content"]["parts"][0]["text"]
 
-    def respond(self, messages: list[Message], actor_id: str) -> str:
-        # here I hardcode pro on purpose; it's just so much better.
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-3-pro-preview:generateContent?key={self.api_key}"
+    @staticmethod
+    def _chunk_text(data: dict) -> Iterator[str]:
+        if "candidates" not in data:
+            raise RuntimeError(f"Gemini error: {data}")
+
+        # The final chunk may carry only the finish reason, without parts
+        for part in data["candidates"][0].get("content", {}).get("parts", ()):
+            if part.get("text"):
+                yield part["text"]
+
+    def _transcript(self, messages: Sequence[Message]) -> str:
+        """Render the non-system messages as "Actor N: text" blocks.
+
+        A provider sees the same history every turn plus a few new messages,
+        so the rendered text is cached and only the new messages are formatted.
+        """
+        count, last, text = self._transcript_cache
+        if not (0 < count <= len(messages) and messages[count - 1] is last):
+            count, text = 0, ""
+
+        new_lines = (
+            f"{msg.actor_id or ('User' if msg.role == 'user' else 'Assistant')}: "
+            f"{msg.content}"
+            for msg in messages[count:]
+            if msg.role != "system"  # Skip system messages in transcript
+        )
+        text = "\n\n".join(chain((text,) if text else (), new_lines))
+
+        if messages:
+            self._transcript_cache = (len(messages), messages[-1], text)
+        return text
 
+    def _prefill_payload(self, messages: Sequence[Message], actor_id: str) -> dict:
+        """Build the payload for a prefill (continuation) call."""
         # Build conversation as a text transcript - this goes ENTIRELY in the model block
         # The trick: model "continues" the transcript as if predicting text, not responding
-        transcript_lines = []
-
-        # Find the last system message that defines the current actor's persona/instructions
-        # In our new architecture, it's the first message in the list
-        persona_info = self.PERSONA
-        for msg in messages:
-            if msg.role == "system":
-                # Extract identity if provided in system message
-                if f"You are {actor_id}" in msg.content:
-                    # We keep the custom persona but acknowledge the system instruction
-                    pass
-
-        # Add persona header so the model knows WHO this actor is
-        transcript_lines.append(f"[{actor_id} is {self.PERSONA}]")
-
-        for msg in messages:
-            if msg.role == "system":
-                continue  # Skip system messages in transcript
-            prefix = msg.actor_id or ("User" if msg.role == "user" else "Assistant")
-            transcript_lines.append(f"{prefix}: {msg.content}")
+        # Persona header first, so the model knows WHO this actor is
+        header = f"[{actor_id} is {self.PERSONA}]"
+        history = self._transcript(messages)
 
         # The ENTIRE transcript + start of this actor's turn goes in model prefill
-        transcript = "\n\n".join(transcript_lines)
+        transcript = f"{header}\n\n{history}" if history else header
         prefill = f"{transcript}\n\n{actor_id}:"
 
         payload = {
             "systemInstruction": {
-                "parts": [{"text": _load_prompt("system_transcript_sim")}]
+                "parts": [{"text": self.SYSTEM_TRANSCRIPT_SIM}]
             },
             "contents": [
                 {
@@ -101,117 +209,96 @@ class GeminiPrefillProvider(Provider):
             },
         }
 
-        response = requests.post(url, json=payload)
-        data = response.json()
-
-        if "candidates" not in data:
-            raise RuntimeError(f"Gemini error: {data}")
-
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-
-    def respond_vote(self, messages: list[Message], actor_id: str) -> str:
-        """Use official google-genai SDK for the final judge vote.
-
-        Prefill mode is intentionally not used here.
-        """
+        return payload
 
+    @cached_property
+    def _genai_client(self):
+        """google-genai client for judge votes, created on the first vote."""
         # Import lazily so the rest of the provider works even if google-genai
         # is not installed (though it is a project dependency).
         try:
             from google import genai  # type: ignore[import-not-found]
-            from google.genai import types  # type: ignore[import-not-found]
         except Exception as exc:  # pragma: no cover
             raise RuntimeError(
                 "google-genai is required for judge voting; install project dependencies"
             ) from exc
 
-        # Build conversation context for the model
-        context_lines: list[str] = []
-        for msg in messages:
-            if msg.role == "system":
-                continue
-            prefix = msg.actor_id or ("User" if msg.role == "user" else "Assistant")
-            context_lines.append(f"{prefix}: {msg.content}")
+        return genai.Client(api_key=self.api_key)
+
+    def respond_vote(self, messages: Sequence[Message], actor_id: str) -> str:
+        """Use official google-genai SDK for the final judge vote.
 
-        context = "\n\n".join(context_lines)
+        Prefill mode is intentionally not used here.
+        """
+        client = self._genai_client
+        from google.genai import types  # type: ignore[import-not-found]
 
-        judge_instruction = _load_prompt("judge_vote")
+        # Build conversation context for the model
+        context = self._transcript(messages)
+
+        judge_instruction = self.JUDGE_VOTE
 
         prompt = (
             "Here is the conversation transcript. Analyze it carefully and identify the human.\n\n"
             f"{context}"
         )
 
-        def extract_json_object(text: str) -> str:
-            candidate = text.strip()
-            if "```" in candidate:
-                match = re.search(
-                    r"```(?:json)?\s*(\{.*?\})\s*```", candidate, re.DOTALL
-                )
-                if match:
-                    candidate = match.group(1).strip()
-
-            if candidate.startswith("{") and candidate.endswith("}"):
-                return candidate
-
-            match = re.search(r"(\{.*\})", candidate, re.DOTALL)
-            return match.group(1).strip() if match else candidate
-
-        client = genai.Client(api_key=self.api_key)
-
-        last_text = ""
-        for attempt in range(2):
-            attempt_prompt = prompt
-            extra_system = None
-            if attempt == 1 and last_text:
-                attempt_prompt = (
-                    f"{prompt}\n\n"
-                    "Your previous response was NOT valid JSON or was missing required keys. "
-                    "Return ONLY valid JSON with keys reasoning and vote.\n\n"
-                    f"Previous output:\n{last_text}"
-                )
-                extra_system = (
-                    "Return a single JSON object and nothing else. "
-                    "Do not include markdown formatting."
-                )
-
-            system_instruction = (
-                judge_instruction
-                if not extra_system
-                else f"{judge_instruction}\n\n{extra_system}"
-            )
+        def parse_json_object(text: str):
+            # The response is requested as application/json, so it is usually
+            # parseable as-is; only dig for an embedded object when it isn't
+            try:
+                return _json.loads(text)
+            except _json.JSONDecodeError:
+                return _json.loads(_json.extract_object(text))
+
+        def vote_json(text: str) -> str | None:
+            """Normalize a judge response to strict vote JSON (None if invalid)."""
+            try:
+                parsed = parse_json_object(text)
+            except _json.JSONDecodeError:
+                return None
+            if not isinstance(parsed, dict):
+                return None
+
+            vote = str(parsed.get("vote", "")).strip()
+            reasoning = str(parsed.get("reasoning", "")).strip()
+            if not vote:
+                return None
 
+            # Re-serialize so callers always get strict JSON.
+            return _json.dumps({"reasoning": reasoning, "vote": vote})
+
+        def ask(contents: str, system_instruction: str) -> str:
             response = client.models.generate_content(
                 model=self.model,
-                contents=attempt_prompt,
+                contents=contents,
                 config=types.GenerateContentConfig(
                     system_instruction=system_instruction,
                     response_mime_type="application/json",
                     max_output_tokens=4096,
                 ),
             )
-
-            text = (response.text or "").strip()
-            last_text = text
-
-            try:
-                parsed = json.loads(extract_json_object(text))
-                if not isinstance(parsed, dict):
-                    raise ValueError("Vote response was not a JSON object")
-                if "vote" not in parsed:
-                    raise ValueError("Vote response missing 'vote'")
-
-                vote = str(parsed.get("vote", "")).strip()
-                reasoning = str(parsed.get("reasoning", "")).strip()
-                if not vote:
-                    raise ValueError("Vote response had empty 'vote'")
-
-                # Re-serialize so callers always get strict JSON.
-                return json.dumps(
-                    {"reasoning": reasoning, "vote": vote}, ensure_ascii=False
-                )
-            except Exception:
-                continue
+            return (response.text or "").strip()
+
+        text = ask(prompt, judge_instruction)
+        vote = vote_json(text)
+        if vote is not None:
+            return vote
+
+        # One retry; if there was output, tell the model what was wrong with it
+        if text:
+            text = ask(
+                f"{prompt}\n\n"
+                "Your previous response was NOT valid JSON or was missing required keys. "
+                "Return ONLY valid JSON with keys reasoning and vote.\n\n"
+                f"Previous output:\n{text}",
+                f"{judge_instruction}\n\n"
+                "Return a single JSON object and nothing else. "
+                "Do not include markdown formatting.",
+            )
+        else:
+            text = ask(prompt, judge_instruction)
+        vote = vote_json(text)
 
         # Give the caller *something* usable; game.py already has fallback parsing.
-        return last_text
+        return vote if vote is not None else text
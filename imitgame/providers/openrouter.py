@@ -1,59 +1,360 @@
 """OpenRouter provider using OpenAI-compatible API."""
 
-from openai import OpenAI
+import asyncio
+import math
+import os
+import statistics
+import threading
+import weakref
+from collections import deque
+from collections.abc import Iterator, Sequence
+from functools import cached_property
+from importlib import resources
 
+import httpx
+
+from .. import _http, _json
 from .base import Message, Provider
 
+# Model families that only reuse a cached prompt prefix when it is marked
+# with cache_control; the others (OpenAI, DeepSeek, ...) cache automatically
+_CACHE_CONTROL_PREFIXES = ("anthropic/", "google/")
+
+# Reply token budget: the worst case until a model has answered often enough,
+# then 1.3x the p95 of its recent reply lengths (never below the floor)
+_MAX_TOKENS = 512
+_MIN_TOKENS = 96
+_LENGTH_SAMPLES = 20
+
+# With max_history_chars set, history before the most recent messages is
+# replaced by a summary once it outgrows the limit (see _compact())
+_KEEP_RECENT = 8
+_SUMMARY_MODEL = "google/gemini-3-flash-preview"
+_SUMMARY_TOKENS = 400
+_SHARED_SUMMARIES = 64
+_SUMMARIZE_HISTORY = (
+    resources.files("imitgame") / "prompts" / "summarize_history.txt"
+).read_text("utf-8")
+
+
+class _SharedClient:
+    """An HTTP client shared by all providers, closed when its last user leaves.
+
+    Every OpenRouterProvider talks to the same host, so the players share one
+    pool of keep-alive connections instead of each opening (and TLS
+    handshaking) its own. An AsyncClient is bound to the event loop it was
+    first used on, so there is one client per loop; games running on
+    different loops each get (and close) their own.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        # loop -> (client, ids of its users); the sync client is keyed by
+        # self. Entries of loops that are gone disappear with them.
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def get(self, user: object, loop: asyncio.AbstractEventLoop | None = None):
+        key = self if loop is None else loop
+        entry = self._clients.get(key)
+        if entry is None:
+            entry = self._clients[key] = (self._factory(), set())
+        entry[1].add(id(user))
+        return entry[0]
+
+    def release(self, user: object, loop: asyncio.AbstractEventLoop | None = None):
+        """Forget a user; return the client if nobody uses it any more."""
+        key = self if loop is None else loop
+        entry = self._clients.get(key)
+        if entry is None:
+            return None
+        entry[1].discard(id(user))
+        if entry[1]:
+            return None
+        del self._clients[key]
+        return entry[0]
+
+
+_SYNC_CLIENT = _SharedClient(
+    lambda: httpx.Client(
+        timeout=_http.TIMEOUT,
+        transport=httpx.HTTPTransport(limits=_http.LIMITS, retries=_http.RETRIES),
+    )
+)
+_ASYNC_CLIENT = _SharedClient(
+    lambda: httpx.AsyncClient(
+        timeout=_http.TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(limits=_http.LIMITS, retries=_http.RETRIES),
+    )
+)
+
 
 class OpenRouterProvider(Provider):
-    """Provider using OpenRouter's OpenAI-compatible API."""
+    """Provider using OpenRouter's OpenAI-compatible API.
+
+    Requests go straight to the chat completions endpoint over httpx; only
+    the message content of the reply is needed, so there is no SDK in between.
+
+    Long games send the whole history every turn. With ``max_history_chars``
+    set, older messages are replaced by a summary from ``summary_model`` once
+    the history outgrows it; the system prompt and the latest messages are
+    always sent as they are. Off by default: the summary loses detail.
+    """
+
+    # Recent completion lengths per model, shared by instances of the same model
+    _completion_tokens: dict[str, deque[int]] = {}
+    # History summaries, shared because every player summarizes the same
+    # conversation; keyed by what was summarized (see _shared_summary())
+    _summaries: dict[tuple, str] = {}
+    _summaries_lock = threading.Lock()
 
     def __init__(
         self,
         model: str,
         api_key: str | None = None,
         base_url: str = "https://openrouter.ai/api/v1",
+        max_history_chars: int | None = None,
+        summary_model: str = _SUMMARY_MODEL,
     ):
         self.model = model
-        self.client = OpenAI(base_url=base_url, api_key=api_key or self._get_api_key())
+        self.max_history_chars = max_history_chars
+        self.summary_model = summary_model
+        self._cache_control = model.startswith(_CACHE_CONTROL_PREFIXES)
+        self._url = f"{base_url.rstrip('/')}/chat/completions"
+        self._headers = {
+            **_json.HEADERS,
+            "Authorization": f"Bearer {api_key or self._get_api_key()}",
+        }
+        # (count, first and last message, converted list) - see _openai_messages()
+        self._converted: tuple = (0, None, None, [])
+        # (summarized count, last summarized message, summary) - see _compact()
+        self._summary: tuple[int, Message | None, Message | None] = (0, None, None)
 
     def _get_api_key(self) -> str:
-        import os
-
         key = os.environ.get("OPENROUTER_API_KEY")
         if not key:
             raise ValueError("OPENROUTER_API_KEY environment variable not set")
         return key
 
-    @property
+    @cached_property
     def name(self) -> str:
         # Extract short name from model string like "openai/gpt-4o" -> "gpt-4o"
-        return self.model.split("/")[-1] if "/" in self.model else self.model
+        return self.model.rsplit("/", 1)[-1]
+
+    def close(self) -> None:
+        client = _SYNC_CLIENT.release(self)
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        client = _ASYNC_CLIENT.release(self, asyncio.get_running_loop())
+        if client is not None:
+            await client.aclose()
+
+    def _sync_client(self) -> httpx.Client:
+        return _SYNC_CLIENT.get(self)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        return _ASYNC_CLIENT.get(self, asyncio.get_running_loop())
+
+    def _to_openai(self, msg: Message) -> dict:
+        if msg.role == "system" and self._cache_control:
+            # The system prompt is the same every turn: let the provider
+            # keep it cached instead of re-reading it
+            return {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": msg.content,
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            }
+        if msg.role != "system" and msg.actor_id:
+            # Include actor_id in content for multi-party chat simulation
+            # (otherwise models see assistant messages and try to continue them)
+            # Multi-party: prefix with actor name, use user role
+            # This prevents models from "continuing" other actors' messages
+            return {"role": "user", "content": f"{msg.actor_id}: {msg.content}"}
+        return {"role": msg.role, "content": msg.content}
 
-    def respond(self, messages: list[Message], actor_id: str) -> str:
+    def _openai_messages(self, messages: Sequence[Message]) -> list[dict]:
         # Convert to OpenAI format
-        # Include actor_id in content for multi-party chat simulation
-        # (otherwise models see assistant messages and try to continue them)
-        openai_messages = []
-
-        for msg in messages:
-            if msg.role == "system":
-                openai_messages.append({"role": "system", "content": msg.content})
-            elif msg.actor_id:
-                # Multi-party: prefix with actor name, use user role
-                # This prevents models from "continuing" other actors' messages
-                openai_messages.append({
-                    "role": "user",
-                    "content": f"{msg.actor_id}: {msg.content}"
-                })
-            else:
-                openai_messages.append({"role": msg.role, "content": msg.content})
-
-        response = self.client.chat.completions.create(
-            model=self.model, messages=openai_messages, max_tokens=512
+        # A provider sees the same history every turn plus a few new messages,
+        # so the converted list is kept and only the new messages are added
+        count, first, last, openai_messages = self._converted
+        if not (
+            0 < count <= len(messages)
+            and messages[0] is first
+            and messages[count - 1] is last
+        ):
+            count, openai_messages = 0, []
+
+        openai_messages.extend(map(self._to_openai, messages[count:]))
+
+        if messages:
+            self._converted = (
+                len(messages), messages[0], messages[-1], openai_messages
+            )
+        return openai_messages
+
+    def _compact(self, messages: Sequence[Message]) -> Sequence[Message]:
+        """Swap older history for a summary once it's over max_history_chars.
+
+        The summary covers messages[1:cut] and is kept until the messages
+        after it outgrow the limit again, so the prompt prefix stays the same
+        (and cacheable) between summaries.
+        """
+        if self.max_history_chars is None or not messages:
+            return messages
+        cut, last, summary = self._summary
+        if not (0 < cut <= len(messages) and messages[cut - 1] is last):
+            cut, summary = 1, None
+
+        size = sum(len(m.content) for m in messages[cut:])
+        if summary is not None:
+            size += len(summary.content)
+        # Summarize in batches: only once there are _KEEP_RECENT messages to
+        # fold in besides the _KEEP_RECENT that stay verbatim. Cuts fall on
+        # multiples of _KEEP_RECENT, so players asked a few messages apart
+        # summarize the same span and share the summary.
+        if size > self.max_history_chars and len(messages) - cut >= 2 * _KEEP_RECENT:
+            new_cut = len(messages) - _KEEP_RECENT
+            new_cut -= (new_cut - 1) % _KEEP_RECENT
+            summary = Message(
+                role="system",
+                content="Prior context summary: "
+                + self._shared_summary(summary, messages[cut:new_cut]),
+            )
+            cut = new_cut
+            self._summary = (cut, messages[cut - 1], summary)
+            # The prompt no longer extends the one converted before
+            self._converted = (0, None, None, [])
+
+        if summary is None:
+            return messages
+        return [messages[0], summary, *messages[cut:]]
+
+    def _shared_summary(
+        self, summary: Message | None, messages: Sequence[Message]
+    ) -> str:
+        """Summary of the messages (and a previous summary), made once per game.
+
+        Concurrent players wait for the one summary call instead of each
+        making an identical one.
+        """
+        key = (
+            self.summary_model,
+            summary.content if summary is not None else None,
+            tuple((m.actor_id, m.content) for m in messages),
         )
+        with self._summaries_lock:
+            text = self._summaries.get(key)
+            if text is None:
+                text = self._summarize(summary, messages)
+                if len(self._summaries) >= _SHARED_SUMMARIES:
+                    del self._summaries[next(iter(self._summaries))]
+                self._summaries[key] = text
+        return text
 
-        if response.choices is None:
-            raise RuntimeError(f"No response from {self.model}")
+    def _summarize(self, summary: Message | None, messages: Sequence[Message]) -> str:
+        transcript = "\n\n".join(
+            f"{m.actor_id or m.role}: {m.content}" for m in messages
+        )
+        if summary is not None:
+            transcript = f"{summary.content}\n\n{transcript}"
+        body = _json.dumpb({
+            "model": self.summary_model,
+            "messages": [
+                {"role": "system", "content": _SUMMARIZE_HISTORY},
+                {"role": "user", "content": transcript},
+            ],
+            "max_tokens": _SUMMARY_TOKENS,
+        })
+        data = _json.loads(self._post(body).raise_for_status().content)
+        if not data.get("choices"):
+            raise RuntimeError(
+                f"No response from {self.summary_model}: {data.get('error')}"
+            )
+        return data["choices"][0]["message"].get("content") or ""
+
+    def _post(self, body: bytes) -> httpx.Response:
+        return _http.post(
+            self._sync_client(), self._url, content=body, headers=self._headers
+        )
+
+    def _request_body(self, messages: Sequence[Message], **extra) -> bytes:
+        payload = {
+            "model": self.model,
+            "messages": self._openai_messages(messages),
+            "max_tokens": self._max_tokens(),
+            **extra,
+        }
+        return _json.dumpb(payload)
+
+    def _max_tokens(self) -> int:
+        lengths = self._completion_tokens.get(self.model)
+        if lengths is None or len(lengths) < _LENGTH_SAMPLES:
+            return _MAX_TOKENS
+        p95 = statistics.quantiles(lengths, n=20)[18]
+        return max(_MIN_TOKENS, min(_MAX_TOKENS, math.ceil(p95 * 1.3)))
+
+    def _record_usage(self, usage: dict | None) -> None:
+        if usage and usage.get("completion_tokens") is not None:
+            lengths = self._completion_tokens.setdefault(self.model, deque(maxlen=200))
+            lengths.append(usage["completion_tokens"])
+
+    def _completion_text(self, response: httpx.Response) -> str:
+        response.raise_for_status()
+        data = _json.loads(response.content)
+        # OpenRouter reports some upstream failures as a 200 with an error body
+        if not data.get("choices"):
+            raise RuntimeError(f"No response from {self.model}: {data.get('error')}")
+
+        self._record_usage(data.get("usage"))
+        return data["choices"][0]["message"].get("content") or ""
+
+    def respond(self, messages: Sequence[Message], actor_id: str) -> str:
+        return "".join(self.respond_stream(messages, actor_id))
+
+    async def arespond(self, messages: Sequence[Message], actor_id: str) -> str:
+        if self.max_history_chars is not None:
+            # Summarizing is a blocking call; keep it off the event loop
+            messages = await asyncio.to_thread(self._compact, messages)
+        body = self._request_body(messages)
+        response = await _http.apost(
+            self._async_client(), self._url, content=body, headers=self._headers
+        )
+        return self._completion_text(response)
+
+    def respond_stream(
+        self, messages: Sequence[Message], actor_id: str
+    ) -> Iterator[str]:
+        body = self._request_body(
+            self._compact(messages), stream=True, stream_options={"include_usage": True}
+        )
+        with _http.stream_post(
+            self._sync_client(), self._url, content=body, headers=self._headers
+        ) as response:
+            yield from self._stream_text(response)
 
-        return response.choices[0].message.content or ""
+    def _stream_text(self, response: httpx.Response) -> Iterator[str]:
+        # Errors (and upstreams that ignore stream=True) come back as JSON
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith("text/event-stream"):
+            response.read()
+            yield self._completion_text(response)
+            return
+        # Server-sent events; lines starting with ":" are keep-alive comments
+        for line in response.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = _json.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(f"No response from {self.model}: {chunk['error']}")
+            # Usage arrives in the last chunk
+            self._record_usage(chunk.get("usage"))
+            choices = chunk.get("choices")
+            if choices and choices[0]["delta"].get("content"):
+                yield choices[0]["delta"]["content"]